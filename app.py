@@ -1,33 +1,34 @@
+import functools
+import importlib.util
 import json
 import os
+import re
+import shelve
+import shutil
+import string
+import sys
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
+from collections import Counter, OrderedDict, deque, namedtuple
 from datetime import datetime
+from html import escape
 from io import BytesIO
+from xml.etree import ElementTree
 
 import streamlit as st
+from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 
 # ============ IMPORTS & SETUP ============
-try:
-    import PyPDF2
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
-
-try:
-    from docx import Document as DocxDocument
-    DOCX_SUPPORT = True
-except ImportError:
-    DOCX_SUPPORT = False
-
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.lib.units import inch
-    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
-    PDF_EXPORT_SUPPORT = True
-except ImportError:
-    PDF_EXPORT_SUPPORT = False
+# File readers and exporters are only needed for uploads and downloads, so they are imported on first use
+PDFIUM_SUPPORT = importlib.util.find_spec("pypdfium2") is not None
+PDF_SUPPORT = importlib.util.find_spec("PyPDF2") is not None
+DOCX_SUPPORT = importlib.util.find_spec("docx") is not None
+PDF_EXPORT_SUPPORT = importlib.util.find_spec("reportlab") is not None
 
 # ============ PAGE CONFIG ============
 st.set_page_config(
@@ -38,30 +39,96 @@ st.set_page_config(
 )
 
 # ============ LLM INITIALIZATION ============
+# Full resumes get the 70B model; scoring and chat replies are short enough for the much faster 8B one
+RESUME_MODEL = "llama-3.3-70b-versatile"
+FAST_MODEL = "llama-3.1-8b-instant"
+
 @st.cache_resource
-def init_llm(api_key):
+def init_llm(api_key, model_name=RESUME_MODEL, temperature=0.3):
     if not api_key:
         return None
     return ChatGroq(
-        temperature=0.3,
-        model_name="llama-3.3-70b-versatile",
+        temperature=temperature,
+        model_name=model_name,
         groq_api_key=api_key
     )
 
-def get_api_key():
-    api_key = os.getenv("GROQ_API_KEY")
-    if api_key:
-        return api_key
+@st.cache_data(ttl=5 * 60, show_spinner=False)
+def get_secrets_api_key():
+    """Read the key from secrets.toml, re-checking the file at most every few minutes"""
     try:
         return st.secrets["GROQ_API_KEY"]
     except (FileNotFoundError, KeyError):
         pass
     return ""
 
+def get_api_key():
+    # The environment is not cached: the sidebar key field sets it at runtime
+    return os.getenv("GROQ_API_KEY") or get_secrets_api_key()
+
 initial_api_key = get_api_key()
 llm = init_llm(initial_api_key) if initial_api_key else None
 
+# ============ VERSION STORE ============
+MAX_RESUME_VERSIONS = 10
+VERSIONS_IN_MEMORY = 3
+
+def _discard_spill(shelf, spill_dir):
+    shelf.close()
+    shutil.rmtree(spill_dir, ignore_errors=True)
+
+class ResumeVersionStore:
+    """Saved resume versions; the newest stay in memory, older ones spill to a temp file"""
+    
+    def __init__(self, max_versions=MAX_RESUME_VERSIONS, in_memory=VERSIONS_IN_MEMORY):
+        self.max_versions = max_versions
+        self.in_memory = in_memory
+        self._names = []
+        self._recent = OrderedDict()
+        self._shelf = None
+    
+    def _spill(self):
+        if self._shelf is None:
+            spill_dir = tempfile.mkdtemp(prefix="resumake_versions_")
+            self._shelf = shelve.open(os.path.join(spill_dir, "versions"))
+            weakref.finalize(self, _discard_spill, self._shelf, spill_dir)
+        return self._shelf
+    
+    def __setitem__(self, name, resume_text):
+        if name in self._names:
+            self._names.remove(name)
+        self._names.append(name)
+        self._recent[name] = resume_text
+        self._recent.move_to_end(name)
+        
+        while len(self._recent) > self.in_memory:
+            old_name, old_text = self._recent.popitem(last=False)
+            self._spill()[old_name] = old_text
+        
+        while len(self._names) > self.max_versions:
+            evicted = self._names.pop(0)
+            if evicted in self._recent:
+                del self._recent[evicted]
+            else:
+                del self._spill()[evicted]
+    
+    def __getitem__(self, name):
+        if name in self._recent:
+            return self._recent[name]
+        if name not in self._names:
+            raise KeyError(name)
+        return self._spill()[name]
+    
+    def __len__(self):
+        return len(self._names)
+    
+    def keys(self):
+        return list(self._names)
+
 # ============ SESSION STATE ============
+# Each assistant mode keeps only its most recent messages (50 question/answer turns)
+CHAT_HISTORY_LIMIT = 100
+
 if 'resume_data' not in st.session_state:
     st.session_state.resume_data = {
         'personal_info': {},
@@ -74,92 +141,362 @@ if 'resume_data' not in st.session_state:
 if 'generated_resume' not in st.session_state:
     st.session_state.generated_resume = ""
 if 'resume_versions' not in st.session_state:
-    st.session_state.resume_versions = {}
+    st.session_state.resume_versions = ResumeVersionStore()
+if 'version_counter' not in st.session_state:
+    st.session_state.version_counter = 0
 if 'ats_score' not in st.session_state:
     st.session_state.ats_score = None
 if 'ats_feedback' not in st.session_state:
     st.session_state.ats_feedback = ""
+if 'ats_results' not in st.session_state:
+    st.session_state.ats_results = None
 if 'edit_mode' not in st.session_state:
     st.session_state.edit_mode = False
 if 'page' not in st.session_state:
     st.session_state.page = "Home"
 if 'chat_history_general' not in st.session_state:
-    st.session_state.chat_history_general = []
+    st.session_state.chat_history_general = deque(maxlen=CHAT_HISTORY_LIMIT)
 if 'chat_history_guidance' not in st.session_state:
-    st.session_state.chat_history_guidance = []
+    st.session_state.chat_history_guidance = deque(maxlen=CHAT_HISTORY_LIMIT)
 if 'uploaded_resume' not in st.session_state:
     st.session_state.uploaded_resume = ""
+if 'export_files' not in st.session_state:
+    st.session_state.export_files = {}
+
+# ============ CACHE TELEMETRY ============
+_cache_miss = threading.local()
+
+def payload_size(result):
+    """Approximate size of a cached result's payload: bytes/str lengths, summed through containers"""
+    if result is None:
+        return 0
+    if isinstance(result, (bytes, bytearray, str)):
+        return len(result)
+    if isinstance(result, dict):
+        return sum(payload_size(value) for value in result.values())
+    if isinstance(result, (tuple, list)):
+        return sum(payload_size(item) for item in result)
+    return sys.getsizeof(result)
+
+def record_cache_event(name, hit, elapsed_s, result):
+    """Add one cached call to the per-session stats shown in the sidebar"""
+    stats = st.session_state.setdefault('_cache_stats', {})
+    entry = stats.setdefault(name, {'hits': 0, 'misses': 0, 'last_ms': 0.0, 'last_bytes': 0})
+    entry['hits' if hit else 'misses'] += 1
+    entry['last_ms'] = round(elapsed_s * 1000, 2)
+    entry['last_bytes'] = payload_size(result)
+
+def timed_cache(**cache_kwargs):
+    """st.cache_data that records hits, misses, latency and result size per function"""
+    def decorator(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _cache_miss.flag = True
+            return func(*args, **kwargs)
+        
+        cached = st.cache_data(**cache_kwargs)(compute)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Keep an enclosing cached call's miss flag intact when one cached function calls another
+            outer_flag = getattr(_cache_miss, 'flag', False)
+            _cache_miss.flag = False
+            start = time.perf_counter()
+            try:
+                result = cached(*args, **kwargs)
+                record_cache_event(func.__name__, not _cache_miss.flag, time.perf_counter() - start, result)
+            finally:
+                _cache_miss.flag = outer_flag
+            return result
+        
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
 
 # ============ EXPORT FUNCTIONS ============
+def is_section_header(line):
+    """Short all-caps lines are treated as section headings"""
+    # Counting spaces avoids building a word list for every line
+    return line.isupper() and line.count(' ') <= 7
+
+@st.cache_resource
+def pdf_styles():
+    """Build the ReportLab body, header and title styles once per process"""
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    body = getSampleStyleSheet()['Normal']
+    header = ParagraphStyle('ResumeHeader', parent=body, fontName='Helvetica-Bold', fontSize=12, leading=15)
+    title = ParagraphStyle('ResumeTitle', parent=header, fontSize=14, leading=18, alignment=TA_CENTER)
+    return body, header, title
+
+@timed_cache(ttl=24 * 60 * 60, max_entries=32, show_spinner=False)
 def export_to_pdf(resume_text):
-    """Export resume to PDF format"""
+    """Export resume to PDF format, returning (bytes, error)"""
     try:
         if not PDF_EXPORT_SUPPORT:
-            return None
-        
-        from reportlab.lib.enums import TA_LEFT
+            return None, None
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+        body_style, header_style, title_style = pdf_styles()
+        # Flowables hold drawing state while a document builds, so the spacer is shared only within this one
+        spacer = Spacer(1, 0.05*inch)
         
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        for line in resume_text.split('\n'):
-            line = line.strip()
-            if not line:
-                story.append(Spacer(1, 0.05*inch))
-                continue
-            
-            line_safe = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            
-            if line.isupper() and len(line.split()) <= 8:
-                para = Paragraph(f"<b>{line_safe}</b>", styles['Normal'])
-            else:
-                para = Paragraph(line_safe, styles['Normal'])
-            
-            story.append(para)
+        # Split per export on purpose: hashing and pickling for st.cache_data cost more than the split
+        lines = [line.strip() for line in resume_text.splitlines()]
+        title_index = next((i for i, line in enumerate(lines) if line), -1)
+        story = [
+            Paragraph(
+                escape(line, quote=False),
+                title_style if i == title_index else header_style if is_section_header(line) else body_style
+            ) if line else spacer
+            for i, line in enumerate(lines)
+        ]
         
         doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
+        return buffer.getvalue(), None
     except Exception as e:
-        st.error(f"PDF Error: {str(e)}")
-        return None
+        return None, f"PDF Error: {str(e)}"
 
+@timed_cache(ttl=24 * 60 * 60, max_entries=32, show_spinner=False)
 def export_to_docx(resume_text):
-    """Export resume to DOCX format"""
+    """Export resume to DOCX format, returning (bytes, error)"""
     try:
         if not DOCX_SUPPORT:
-            return None
-        
-        from docx import Document
+            return None, None
+        from docx import Document as DocxDocument
+        from docx.enum.style import WD_STYLE_TYPE
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
         from docx.shared import Pt
         
-        doc = Document()
+        doc = DocxDocument()
+        body_style = doc.styles['Normal']
+        body_style.font.size = Pt(11)
+        header_style = doc.styles.add_style('Resume Header', WD_STYLE_TYPE.PARAGRAPH)
+        header_style.base_style = body_style
+        header_style.font.bold = True
+        header_style.font.size = Pt(12)
+        title_style = doc.styles.add_style('Resume Title', WD_STYLE_TYPE.PARAGRAPH)
+        title_style.base_style = header_style
+        title_style.font.size = Pt(14)
+        title_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        for line in resume_text.split('\n'):
+        title_pending = True
+        for line in resume_text.splitlines():
             line = line.strip()
             if not line:
                 doc.add_paragraph()
-                continue
-            
-            p = doc.add_paragraph(line)
-            
-            if line.isupper() and len(line.split()) <= 8:
-                for run in p.runs:
-                    run.font.bold = True
-                    run.font.size = Pt(12)
+            elif title_pending:
+                doc.add_paragraph(line, style=title_style)
+                title_pending = False
+            elif is_section_header(line):
+                doc.add_paragraph(line, style=header_style)
             else:
-                for run in p.runs:
-                    run.font.size = Pt(11)
+                doc.add_paragraph(line)
         
         buffer = BytesIO()
         doc.save(buffer)
-        buffer.seek(0)
-        return buffer.getvalue()
+        return buffer.getvalue(), None
     except Exception as e:
-        st.error(f"DOCX Error: {str(e)}")
-        return None
+        return None, f"DOCX Error: {str(e)}"
+
+# ============ PROMPT PAYLOADS ============
+RESUME_SECTIONS = ('personal_info', 'education', 'certifications', 'experience', 'projects', 'skills')
+
+@timed_cache(max_entries=64, show_spinner=False)
+def section_json(section_data):
+    """Serialize one resume section as compact JSON"""
+    return json.dumps(section_data, separators=(',', ':'), ensure_ascii=False)
+
+def build_resume_payload(resume_data):
+    """Build the generation prompt inputs; sections are cached one by one, so an edit re-serializes only that section"""
+    payload = {section: section_json(resume_data[section]) for section in RESUME_SECTIONS}
+    payload['target_role'] = resume_data['personal_info'].get('target_role', 'Professional')
+    return payload
+
+# ============ RESUME STATISTICS ============
+_ACTION_VERB_RE = re.compile(r'\b(led|managed|developed|implemented|created|improved)\b', re.IGNORECASE)
+_DIGIT_REMOVER = str.maketrans('', '', string.digits)
+
+@timed_cache(max_entries=32, show_spinner=False)
+def resume_statistics(resume_text):
+    """Return (word_count, line_count, action_verb_count, digit_count) for a resume"""
+    word_count = len(resume_text.split())
+    line_count = resume_text.count('\n') + 1
+    verb_count = len(_ACTION_VERB_RE.findall(resume_text))
+    digit_count = len(resume_text) - len(resume_text.translate(_DIGIT_REMOVER))
+    return word_count, line_count, verb_count, digit_count
+
+# ============ ATS FEEDBACK ============
+# Only a leading word boundary, so inflections like "strengths" or "improvements" still match
+STRENGTH_RE = re.compile(r'\b(?:strength|strong|good|excellent|well)', re.IGNORECASE)
+WEAKNESS_RE = re.compile(r'\b(?:weakness|weak|missing|lack|improve|add|consider)', re.IGNORECASE)
+BULLET_RE = re.compile(r'^[\s•\-*0-9.)]+')
+
+ATS_TIPS = [
+    "Tailor the resume with keywords from the job description",
+    "Quantify achievements with numbers and metrics",
+    "Use strong action verbs to start bullet points",
+    "Use standard section headings (Work Experience, Education, Skills)",
+    "Avoid graphics, tables, and images",
+    "Avoid using information in headers and footers",
+    "Use standard fonts (Arial, Calibri, Times New Roman)",
+    "Save as .docx or .pdf for best compatibility",
+    "Proofread carefully to avoid errors",
+]
+
+SCORE_BAR_HTML = """<div style='position: relative; width: 100%; height: 50px; background-color: #f0f0f0; border-radius: 10px; overflow: hidden; margin: 20px 0;'>
+<div style='width: {score}%; height: 100%; background: linear-gradient(90deg, {color} 0%, {color} 100%);'></div>
+<div style='position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); font-weight: bold; font-size: 18px; color: #333;'>
+Score: {score} — {status}
+</div>
+</div>"""
+
+_KEYWORD_RE = re.compile(r'[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]')
+_STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could
+do does each etc for from has have having how if in including into is it its job just may more
+most must new not of on one or other our out over per plus preferred required role should so
+some strong such than that the their them then there these they this those through to under
+up us using we well what when where which while who will with within work working would you your
+years year experience ability team teams skills knowledge candidate responsibilities requirements
+need needs looking seeking join help ideal
+""".split())
+
+def _keywords(text):
+    return Counter(
+        token for token in _KEYWORD_RE.findall(text.lower())
+        if token not in _STOPWORDS and not token.strip('.+#-').isdigit()
+    )
+
+@timed_cache(max_entries=32, show_spinner=False)
+def local_keyword_match(resume_text, job_description, max_missing=20):
+    """Instant keyword overlap check: (percent of job keywords found in the resume, most frequent missing ones)"""
+    job_keywords = _keywords(job_description)
+    if not job_keywords:
+        return 0, []
+    resume_keywords = _keywords(resume_text)
+    missing = [word for word, _ in job_keywords.most_common() if word not in resume_keywords]
+    match_pct = round(100 * (len(job_keywords) - len(missing)) / len(job_keywords))
+    return match_pct, missing[:max_missing]
+
+_JSON_DECODER = json.JSONDecoder()
+
+def parse_json_reply(reply):
+    """Return the JSON object in an LLM reply, or an empty dict if there isn't one"""
+    try:
+        result = json.loads(reply)
+    except json.JSONDecodeError:
+        # JSON mode wasn't honoured; fall back to the first object embedded in the text
+        json_start = reply.find('{')
+        if json_start == -1:
+            return {}
+        try:
+            result, _ = _JSON_DECODER.raw_decode(reply, json_start)
+        except json.JSONDecodeError:
+            return {}
+    return result if isinstance(result, dict) else {}
+
+def _feedback_items(lines, pattern):
+    matches = [line.strip() for line in lines if pattern.search(line)]
+    return [BULLET_RE.sub('', item, count=1) for item in matches[:5] if item and len(item) > 5] if matches else None
+
+def build_ats_report(response_text):
+    """Parse an ATS reply into everything the report renders; unparseable replies keep only 'raw'"""
+    result = parse_json_reply(response_text)
+    if not result:
+        return {'raw': response_text}
+    # Valid JSON can still carry odd shapes; anything the report cannot show as text falls back to 'raw'
+    try:
+        score = max(0, min(100, int(result.get('score', 75))))
+    except (TypeError, ValueError):
+        return {'raw': response_text}
+    keyword_match = result.get('keyword_match', '60%')
+    suggestions = result.get('suggestions', response_text)
+    if isinstance(suggestions, list):
+        suggestions = "\n".join(str(item) for item in suggestions)
+    if not isinstance(keyword_match, (str, int, float)) or not isinstance(suggestions, str):
+        return {'raw': response_text}
+    
+    missing_keywords = result.get('missing_keywords', [])
+    if isinstance(missing_keywords, list):
+        missing_keywords = [str(keyword) for keyword in missing_keywords]
+    suggestions_str = suggestions
+    suggestions_lower = suggestions_str.lower()
+    suggestion_lines = suggestions_str.splitlines()
+    
+    if "strength" in suggestions_lower:
+        strengths = _feedback_items(suggestion_lines, STRENGTH_RE)
+        if strengths is None:
+            strengths = ["Resume aligns well with job requirements", "Strong use of relevant keywords"]
+    else:
+        strengths = ["Resume aligns well with job requirements", "Good keyword coverage"]
+    
+    if "weakness" in suggestions_lower or "missing" in suggestions_lower:
+        weaknesses = _feedback_items(suggestion_lines, WEAKNESS_RE)
+        if weaknesses is None:
+            weaknesses = ["Consider adding more specific metrics", "Include more industry-specific keywords"]
+    else:
+        weaknesses = ["Consider adding more metrics and numbers", "Include more technical keywords"]
+    
+    is_keyword_list = isinstance(missing_keywords, list)
+    return {
+        'score': score,
+        'keyword_match': str(keyword_match),
+        'color': "#00CC44" if score >= 80 else "#FFA500" if score >= 60 else "#FFD700" if score >= 40 else "#FF4444",
+        'status': ["Needs Improvement ❌", "Fair ⚠️", "Good 👍", "Excellent ✅"][min(3, score // 40)],
+        'missing_count': len(missing_keywords) if is_keyword_list else "N/A",
+        'missing_keywords': missing_keywords[:10] if is_keyword_list and missing_keywords else ["No critical keywords missing"],
+        'strengths': strengths,
+        'weaknesses': weaknesses,
+    }
+
+# ============ FILE PARSING ============
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_DOCX_BREAKS = {_W + 'tab': '\t', _W + 'br': '\n', _W + 'cr': '\n'}
+
+def docx_paragraphs(file_bytes):
+    """Yield paragraph text from a .docx by streaming its document XML"""
+    with zipfile.ZipFile(BytesIO(file_bytes)) as archive, archive.open('word/document.xml') as xml:
+        for _, elem in ElementTree.iterparse(xml):
+            if elem.tag != _W + 'p':
+                continue
+            yield ''.join(
+                (node.text or '') if node.tag == _W + 't' else _DOCX_BREAKS.get(node.tag, '')
+                for node in elem.iter()
+            )
+            # Dropping finished paragraphs keeps memory flat and stops nested text boxes being read twice
+            elem.clear()
+
+@st.cache_resource
+def _pdfium_lock():
+    """One lock per process: PDFium is not thread-safe and every session runs in its own thread"""
+    return threading.Lock()
+
+@timed_cache(max_entries=8, show_spinner=False)
+def extract_resume_text(file_bytes, mime):
+    """Extract plain text from an uploaded resume file"""
+    if mime == "text/plain":
+        return file_bytes.decode("utf-8")
+    if mime == "application/pdf" and PDFIUM_SUPPORT:
+        import pypdfium2 as pdfium
+        with _pdfium_lock():
+            pdf = pdfium.PdfDocument(file_bytes)
+            try:
+                text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+            finally:
+                pdf.close()
+        # PDFium ends lines with \r\n; match the \n the other readers return
+        return text.replace("\r\n", "\n")
+    if mime == "application/pdf" and PDF_SUPPORT:
+        import PyPDF2
+        pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
+        return "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
+    if mime == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+        return "\n".join(docx_paragraphs(file_bytes))
+    return ""
 
 # ============ RESUME TEMPLATES ============
 RESUME_TEMPLATES = {
@@ -170,7 +507,268 @@ RESUME_TEMPLATES = {
     "Hybrid": "Create a hybrid resume combining both chronological and functional formats."
 }
 
+# ============ PROMPT TEMPLATES ============
+# Streamlit rebuilds these templates on every rerun, which is cheap; the chains that use them are
+# composed once per API key by the cached init_chains, not per click.
+# Long per-session context (the resume) sits in the system message ahead of the varying
+# question, so repeated calls share a token prefix the provider can cache.
+_RESUME_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert resume writer. Format with clear sections, use strong action verbs, include metrics, and ensure ATS compatibility.
+
+Create a {template_style} style resume.
+
+Template guidelines: {template_guidelines}"""),
+    ("human", """Create a professional resume with this information:
+
+Personal: {personal_info}
+Education: {education}
+Certifications: {certifications}
+Experience: {experience}
+Projects: {projects}
+Skills: {skills}
+Target Role: {target_role}""")
+])
+
+_REVIEW_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert resume reviewer. Provide brief, actionable feedback."),
+    ("human", "Review this resume and suggest 3-5 key improvements:\n{resume}")
+])
+
+_ATS_RUBRIC = """You are an ATS analyzer. Provide detailed analysis with:
+1. ATS Score (0-100)
+2. Keyword matching percentage
+3. Missing keywords
+4. Format issues
+5. Specific improvement suggestions
+
+"""
+
+_ATS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _ATS_RUBRIC + """Respond in JSON with 'score', 'keyword_match', 'missing_keywords', 'format_issues', and 'suggestions' fields.
+
+Resume:
+{resume}"""),
+    ("human", """Job Description:\n{job_description}\n\nProvide comprehensive analysis.""")
+])
+
+_ATS_MULTI_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _ATS_RUBRIC + """Respond in JSON with an 'analyses' array holding one object per job description, in the order given, each with 'score', 'keyword_match', 'missing_keywords', 'format_issues', and 'suggestions' fields.
+
+Resume:
+{resume}"""),
+    ("human", """Job Descriptions (JSON array):\n{job_descriptions}\n\nProvide comprehensive analysis for each.""")
+])
+
+_CAREER_CHAT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful career coach. Answer questions about resumes, job hunting, and interviews."),
+    ("human", "{input}")
+])
+
+_GUIDANCE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a resume expert. Provide specific, actionable feedback on resumes.\n\nResume:\n{resume}"),
+    ("human", "{input}")
+])
+
+# ============ CHAINS ============
+@st.cache_resource
+def init_chains(api_key):
+    """Compose every prompt with the LLM once per API key"""
+    model = init_llm(api_key)
+    if not model:
+        return None
+    fast_model = init_llm(api_key, FAST_MODEL)
+    parser = StrOutputParser()
+    # ATS replies are parsed, so ask Groq for a bare JSON object instead of prose around one
+    json_model = init_llm(api_key, FAST_MODEL, temperature=0.1).bind(response_format={"type": "json_object"})
+    return {
+        'resume': _RESUME_PROMPT | model | parser,
+        'review': _REVIEW_PROMPT | model | parser,
+        'ats': _ATS_PROMPT | json_model | parser,
+        'ats_multi': _ATS_MULTI_PROMPT | json_model | parser,
+        'career_coach': _CAREER_CHAT_PROMPT | fast_model | parser,
+        'resume_expert': _GUIDANCE_PROMPT | fast_model | parser,
+    }
+
+chains = init_chains(initial_api_key) if initial_api_key else None
+
+# ============ LLM CALLS ============
+ATS_FAILED_REPLY = "⚠️ The analysis for this job failed ({error}). Scan again to retry."
+
+class ATSScanError(Exception):
+    """Raised when some per-job ATS calls fail; carries every job's reply, with the exception in place of failed ones"""
+    def __init__(self, replies):
+        super().__init__("ATS analysis failed for at least one job description")
+        self.replies = replies
+
+# Replies are cached on their exact inputs, so repeating a scan or question costs no tokens
+@timed_cache(ttl=60 * 60, max_entries=32, show_spinner=False)
+def run_ats_scan(resume_text, job_descriptions, combined=False):
+    """Analyze a resume against each job description, returning one raw JSON reply per job"""
+    if combined and len(job_descriptions) > 1:
+        # One request for every job description sends the resume once instead of per job
+        try:
+            reply = chains['ats_multi'].invoke({"resume": resume_text, "job_descriptions": json.dumps(job_descriptions)})
+        except Exception:
+            # e.g. Groq rejecting JSON-mode output that failed validation; the per-job calls below retry it
+            reply = ""
+        analyses = parse_json_reply(reply).get('analyses')
+        if isinstance(analyses, list) and len(analyses) == len(job_descriptions):
+            return [json.dumps(analysis) for analysis in analyses]
+    
+    # Separate calls per job share the resume prefix and run concurrently; this is also
+    # the fallback when the combined reply doesn't line up
+    replies = chains['ats'].batch(
+        [{"job_description": job_desc, "resume": resume_text} for job_desc in job_descriptions],
+        config={"max_concurrency": len(job_descriptions)},
+        return_exceptions=True
+    )
+    if any(isinstance(reply, Exception) for reply in replies):
+        # Raising keeps st.cache_data from storing the failure, so scanning again retries it
+        raise ATSScanError(replies)
+    return replies
+
+# Streamed replies can't go through st.cache_data, so finished ones are kept in a
+# process-wide store and replayed whole when the same inputs come back
+REPLY_CACHE_TTL = 60 * 60
+REPLY_CACHE_ENTRIES = 64
+@st.cache_resource
+def _reply_store():
+    # The lock lives with the store: module-level objects are recreated on every rerun
+    return OrderedDict(), threading.Lock()
+
+def stream_llm_reply(name, inputs):
+    """Yield an LLM reply chunk by chunk, serving recent identical requests from the reply store"""
+    store, lock = _reply_store()
+    key = (name, tuple(sorted(inputs.items())))
+    start = time.perf_counter()
+    with lock:
+        cached = store.get(key)
+    if cached and time.time() - cached[0] < REPLY_CACHE_TTL:
+        record_cache_event(name, True, time.perf_counter() - start, cached[1])
+        yield cached[1]
+        return
+    
+    chunks = []
+    for chunk in chains[name].stream(inputs):
+        chunks.append(chunk)
+        yield chunk
+    reply = "".join(chunks)
+    record_cache_event(name, False, time.perf_counter() - start, reply)
+    
+    with lock:
+        store[key] = (time.time(), reply)
+        store.move_to_end(key)
+        while len(store) > REPLY_CACHE_ENTRIES:
+            store.popitem(last=False)
+
+def stream_career_coach(question):
+    """Stream an answer to a general career question"""
+    return stream_llm_reply("career_coach", {"input": question})
+
+def stream_resume_expert(resume_text, question):
+    """Stream an answer to a question about a specific resume"""
+    return stream_llm_reply("resume_expert", {"resume": resume_text, "input": question})
+
+# ============ CHAT ============
+# A tuple per message is far smaller than a dict with the same two keys
+ChatMessage = namedtuple('ChatMessage', 'role content')
+
+def render_chat_history(messages):
+    """Render stored chat messages with Streamlit's native chat elements"""
+    for message in messages:
+        with st.chat_message(message.role):
+            st.markdown(message.content)
+
+def chat_turn(history, question, reply_stream):
+    """Show a question and its streamed reply, then add both to the history"""
+    with st.chat_message("user"):
+        st.markdown(question)
+    with st.chat_message("assistant"):
+        response = st.write_stream(reply_stream)
+    history.append(ChatMessage("user", question))
+    history.append(ChatMessage("assistant", response))
+
+# ============ HOME PAGE ============
+# The home page is static, so it is assembled once and sent as a single markdown element.
+# Fragments must not contain blank lines, or markdown would end the HTML block early.
+_FEATURE_CARD = """<div style='padding: 20px; background: white; border-left: 4px solid {color}; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
+<h4 style='color: {color}; margin-top: 0;'>{title}</h4>
+<p style='color: #666;'>{text}</p>
+</div>"""
+
+_STEP_CARD = """<div style='flex: 1; text-align: center; padding: 25px; background: #f8f9fa; border-radius: 12px;'>
+<div style='font-size: 3em; margin-bottom: 15px;'>{number}</div>
+<h3 style='color: #1f77b4; margin-bottom: 15px;'>{title}</h3>
+<p style='color: #666; font-size: 1.05em;'>{text}</p>
+</div>"""
+
+_HOME_HERO = """<h1 style='text-align: center; color: #1f77b4; font-size: 3.5em;'>🤖 RESUMAKE</h1>
+<p style='text-align: center; font-size: 1.3em; color: #999;'>Build professional resumes and optimize them for Applicant Tracking Systems</p>"""
+
+_HOME_TOOLS = """<div style='display: flex; gap: 1rem;'>
+<div style='flex: 1; padding: 30px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white;'>
+<h2 style='color: white; margin-top: 0;'>📝 Resume Builder</h2>
+<ul style='font-size: 1.05em; line-height: 1.8;'>
+<li>✨ Multiple resume templates</li>
+<li>🤖 AI-powered generation</li>
+<li>🔄 Version control</li>
+<li>📥 Multi-format download</li>
+</ul>
+</div>
+<div style='flex: 1; padding: 30px; background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); border-radius: 15px; color: white;'>
+<h2 style='color: white; margin-top: 0;'>🔍 ATS Scanner</h2>
+<ul style='font-size: 1.05em; line-height: 1.8;'>
+<li>📊 Detailed scoring</li>
+<li>🎯 Keyword matching</li>
+<li>💡 Smart suggestions</li>
+<li>📈 Improvement tracking</li>
+</ul>
+</div>
+</div>"""
+
+_HOME_STEPS = (
+    "<h2 style='text-align: center; color: #fff; font-size: 2.5em;'>🚀 How It Works</h2>\n<br>\n"
+    "<div style='display: flex; gap: 1rem;'>\n"
+    + "\n".join(_STEP_CARD.format(number=number, title=title, text=text) for number, title, text in [
+        ("1️⃣", "Choose Your Tool", "Select Resume Builder to create a new resume or ATS Scanner to analyze an existing one from the sidebar"),
+        ("2️⃣", "Input Your Data", "Fill in your information or upload your resume. Our AI will process and optimize it for maximum impact"),
+        ("3️⃣", "Get Results", "Download your polished resume or receive detailed ATS analysis with actionable improvements"),
+    ])
+    + "\n</div>"
+)
+
+_FEATURE_COL_LEFT = "\n".join(_FEATURE_CARD.format(color="#667eea", title=title, text=text) for title, text in [
+    ("🎯 AI-Powered Generation", "Leverage advanced AI to create compelling resume content with strong action verbs and quantifiable achievements"),
+    ("📊 ATS Compatibility", "Ensure your resume passes Applicant Tracking Systems with optimized formatting and keywords"),
+    ("✏️ Easy Editing", "Edit and customize your AI-generated resume to perfectly match your style and preferences"),
+])
+
+_FEATURE_COL_RIGHT = "\n".join(_FEATURE_CARD.format(color="#f5576c", title=title, text=text) for title, text in [
+    ("📈 Score Analysis", "Get a detailed ATS compatibility score with specific feedback on how to improve your resume"),
+    ("📄 Multiple Formats", "Upload and download resumes in various formats including PDF, DOCX, and TXT"),
+    ("🔍 Keyword Matching", "Identify missing keywords from job descriptions and get suggestions to improve your match rate"),
+])
+
+_HOME_FEATURES = (
+    "<h2 style='text-align: center; color: #fff; font-size: 2.5em;'>✨ Key Features</h2>\n<br>\n"
+    "<div style='display: flex; gap: 1rem;'>\n"
+    f"<div style='flex: 1;'>\n{_FEATURE_COL_LEFT}\n</div>\n"
+    f"<div style='flex: 1;'>\n{_FEATURE_COL_RIGHT}\n</div>\n"
+    "</div>"
+)
+
+_HOME_CTA = """<div style='text-align: center; padding: 40px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white;'>
+<h2 style='color: white; font-size: 2.2em; margin-top: 0;'>Ready to Get Started?</h2>
+<p style='font-size: 1.2em; margin-bottom: 25px;'>Choose an option from the sidebar to begin building or scanning your resume!</p>
+<p style='font-size: 1.1em; opacity: 0.9;'>👈 Select <strong>Resume Builder</strong> to create a new resume<br>or <strong>ATS Scanner</strong> to analyze an existing one</p>
+</div>"""
+
+HOME_HTML = "<div>\n" + "\n<br>\n".join([_HOME_HERO, _HOME_TOOLS, _HOME_STEPS, _HOME_FEATURES, _HOME_CTA]) + "\n</div>"
+
 # ============ SIDEBAR ============
+PAGE_EMOJIS = {'Home': '🏠', 'Resume Builder': '📝', 'ATS Scanner': '🔍', 'AI Assistant': '💬'}
+FORMAT_STATUS_MD = f"- TXT: ✅\n- PDF: {'✅' if PDF_EXPORT_SUPPORT else '❌'}\n- DOCX: {'✅' if DOCX_SUPPORT else '❌'}"
+
 with st.sidebar:
     st.title("🤖 RESUMAKE")
     
@@ -189,142 +787,26 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📂 Select Option")
     
-    pages = ["Home", "Resume Builder", "ATS Scanner", "AI Assistant"]
-    for page_name in pages:
-        emoji = {'Home': '🏠', 'Resume Builder': '📝', 'ATS Scanner': '🔍', 'AI Assistant': '💬'}.get(page_name, '📄')
+    for page_name, emoji in PAGE_EMOJIS.items():
         if st.button(f"{emoji} {page_name}", use_container_width=True, type="primary" if st.session_state.page == page_name else "secondary"):
             st.session_state.page = page_name
             st.rerun()
     
     st.markdown("---")
-    st.markdown(f"- TXT: ✅\n- PDF: {'✅' if PDF_EXPORT_SUPPORT else '❌'}\n- DOCX: {'✅' if DOCX_SUPPORT else '❌'}")
+    st.markdown(FORMAT_STATUS_MD)
+    
+    with st.expander("🔧 Cache Stats"):
+        cache_stats = st.session_state.get('_cache_stats', {})
+        if cache_stats:
+            st.table([{'function': name, **entry} for name, entry in cache_stats.items()])
+        else:
+            st.caption("No cached calls yet")
     st.caption("Made with ❤️ using Groq Cloud + LangChain")
 
 # ============ MAIN PAGES ============
 
 if st.session_state.page == "Home":
-    st.markdown("<h1 style='text-align: center; color: #1f77b4; font-size: 3.5em;'>🤖 RESUMAKE</h1>", unsafe_allow_html=True)
-    st.markdown("<p style='text-align: center; font-size: 1.3em; color: #999;'>Build professional resumes and optimize them for Applicant Tracking Systems</p>", unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("""
-        <div style='padding: 30px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white;'>
-            <h2 style='color: white; margin-top: 0;'>📝 Resume Builder</h2>
-            <ul style='font-size: 1.05em; line-height: 1.8;'>
-                <li>✨ Multiple resume templates</li>
-                <li>🤖 AI-powered generation</li>
-                <li>🔄 Version control</li>
-                <li>📥 Multi-format download</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div style='padding: 30px; background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); border-radius: 15px; color: white;'>
-            <h2 style='color: white; margin-top: 0;'>🔍 ATS Scanner</h2>
-            <ul style='font-size: 1.05em; line-height: 1.8;'>
-                <li>📊 Detailed scoring</li>
-                <li>🎯 Keyword matching</li>
-                <li>💡 Smart suggestions</li>
-                <li>📈 Improvement tracking</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
-    st.markdown("<h2 style='text-align: center; color: #fff; font-size: 2.5em;'>🚀 How It Works</h2>", unsafe_allow_html=True)
-    st.markdown("<br>", unsafe_allow_html=True)
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        <div style='text-align: center; padding: 25px; background: #f8f9fa; border-radius: 12px; height: 100%;'>
-            <div style='font-size: 3em; margin-bottom: 15px;'>1️⃣</div>
-            <h3 style='color: #1f77b4; margin-bottom: 15px;'>Choose Your Tool</h3>
-            <p style='color: #666; font-size: 1.05em;'>Select Resume Builder to create a new resume or ATS Scanner to analyze an existing one from the sidebar</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div style='text-align: center; padding: 25px; background: #f8f9fa; border-radius: 12px; height: 100%;'>
-            <div style='font-size: 3em; margin-bottom: 15px;'>2️⃣</div>
-            <h3 style='color: #1f77b4; margin-bottom: 15px;'>Input Your Data</h3>
-            <p style='color: #666; font-size: 1.05em;'>Fill in your information or upload your resume. Our AI will process and optimize it for maximum impact</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div style='text-align: center; padding: 25px; background: #f8f9fa; border-radius: 12px; height: 100%;'>
-            <div style='font-size: 3em; margin-bottom: 15px;'>3️⃣</div>
-            <h3 style='color: #1f77b4; margin-bottom: 15px;'>Get Results</h3>
-            <p style='color: #666; font-size: 1.05em;'>Download your polished resume or receive detailed ATS analysis with actionable improvements</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<br><br>", unsafe_allow_html=True)
-    
-    # Key features section
-    st.markdown("<h2 style='text-align: center; color: #fff; font-size: 2.5em;'>✨ Key Features</h2>", unsafe_allow_html=True)
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        <div style='padding: 20px; background: white; border-left: 4px solid #667eea; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
-            <h4 style='color: #667eea; margin-top: 0;'>🎯 AI-Powered Generation</h4>
-            <p style='color: #666;'>Leverage advanced AI to create compelling resume content with strong action verbs and quantifiable achievements</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div style='padding: 20px; background: white; border-left: 4px solid #667eea; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
-            <h4 style='color: #667eea; margin-top: 0;'>📊 ATS Compatibility</h4>
-            <p style='color: #666;'>Ensure your resume passes Applicant Tracking Systems with optimized formatting and keywords</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div style='padding: 20px; background: white; border-left: 4px solid #667eea; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
-            <h4 style='color: #667eea; margin-top: 0;'>✏️ Easy Editing</h4>
-            <p style='color: #666;'>Edit and customize your AI-generated resume to perfectly match your style and preferences</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div style='padding: 20px; background: white; border-left: 4px solid #f5576c; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
-            <h4 style='color: #f5576c; margin-top: 0;'>📈 Score Analysis</h4>
-            <p style='color: #666;'>Get a detailed ATS compatibility score with specific feedback on how to improve your resume</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div style='padding: 20px; background: white; border-left: 4px solid #f5576c; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
-            <h4 style='color: #f5576c; margin-top: 0;'>📄 Multiple Formats</h4>
-            <p style='color: #666;'>Upload and download resumes in various formats including PDF, DOCX, and TXT</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div style='padding: 20px; background: white; border-left: 4px solid #f5576c; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
-            <h4 style='color: #f5576c; margin-top: 0;'>🔍 Keyword Matching</h4>
-            <p style='color: #666;'>Identify missing keywords from job descriptions and get suggestions to improve your match rate</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<br><br>", unsafe_allow_html=True)
-
-    # Call to action
-    st.markdown("""
-    <div style='text-align: center; padding: 40px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white;'>
-        <h2 style='color: white; font-size: 2.2em; margin-top: 0;'>Ready to Get Started?</h2>
-        <p style='font-size: 1.2em; margin-bottom: 25px;'>Choose an option from the sidebar to begin building or scanning your resume!</p>
-        <p style='font-size: 1.1em; opacity: 0.9;'>👈 Select <strong>Resume Builder</strong> to create a new resume<br>or <strong>ATS Scanner</strong> to analyze an existing one</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(HOME_HTML, unsafe_allow_html=True)
 
 elif st.session_state.page == "Resume Builder":
     st.title("📝 Resume Builder")
@@ -338,137 +820,143 @@ elif st.session_state.page == "Resume Builder":
     st.info(f"📋 {RESUME_TEMPLATES[selected_template]}")
     
     with st.expander("👤 Personal Information", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            name = st.text_input("Full Name*", key="name_input")
-            email = st.text_input("Email*", key="email_input")
-            phone = st.text_input("Phone", key="phone_input")
-        with col2:
-            linkedin = st.text_input("LinkedIn URL", key="linkedin_input")
-            github = st.text_input("GitHub URL", key="github_input")
-            portfolio = st.text_input("Portfolio URL", key="portfolio_input")
-        
-        target_role = st.text_input("Target Role*", key="target_input")
-        summary = st.text_area("Professional Summary", key="summary_input")
-        
-        if st.button("Save Personal Info", key="save_personal"):
-            st.session_state.resume_data['personal_info'] = {
-                'name': name, 'email': email, 'phone': phone,
-                'linkedin': linkedin, 'github': github, 'portfolio': portfolio,
-                'target_role': target_role, 'summary': summary
-            }
-            st.success("✅ Personal information saved!")
-    
-    with st.expander("🎓 Education"):
-        num_edu = st.number_input("Number of Education Entries", min_value=0, max_value=10, value=1, key="num_edu")
-        education_entries = []
-        
-        for i in range(num_edu):
-            st.markdown(f"**Education #{i+1}**")
+        with st.form("form_personal"):
             col1, col2 = st.columns(2)
             with col1:
-                degree = st.text_input(f"Degree", key=f"edu_degree_{i}")
-                institution = st.text_input(f"Institution", key=f"edu_inst_{i}")
+                name = st.text_input("Full Name*", key="name_input")
+                email = st.text_input("Email*", key="email_input")
+                phone = st.text_input("Phone", key="phone_input")
             with col2:
-                year = st.text_input(f"Year", key=f"edu_year_{i}")
-                gpa = st.text_input(f"GPA (optional)", key=f"edu_gpa_{i}")
+                linkedin = st.text_input("LinkedIn URL", key="linkedin_input")
+                github = st.text_input("GitHub URL", key="github_input")
+                portfolio = st.text_input("Portfolio URL", key="portfolio_input")
             
-            if degree and institution:
-                education_entries.append({'degree': degree, 'institution': institution, 'year': year, 'gpa': gpa})
-            st.markdown("---")
-        
-        if st.button("Save Education", key="save_edu"):
-            st.session_state.resume_data['education'] = education_entries
-            st.success("✅ Education saved!")
+            target_role = st.text_input("Target Role*", key="target_input")
+            summary = st.text_area("Professional Summary", key="summary_input")
+            
+            if st.form_submit_button("Save Personal Info"):
+                st.session_state.resume_data['personal_info'] = {
+                    'name': name, 'email': email, 'phone': phone,
+                    'linkedin': linkedin, 'github': github, 'portfolio': portfolio,
+                    'target_role': target_role, 'summary': summary
+                }
+                st.success("✅ Personal information saved!")
+    
+    with st.expander("🎓 Education"):
+        num_edu = st.number_input("Number of Education Entries", min_value=0, max_value=10, value=1, key="num_edu")
+        with st.form("form_education"):
+            education_entries = []
+            
+            for i in range(num_edu):
+                st.markdown(f"**Education #{i+1}**")
+                col1, col2 = st.columns(2)
+                with col1:
+                    degree = st.text_input(f"Degree", key=f"edu_degree_{i}")
+                    institution = st.text_input(f"Institution", key=f"edu_inst_{i}")
+                with col2:
+                    year = st.text_input(f"Year", key=f"edu_year_{i}")
+                    gpa = st.text_input(f"GPA (optional)", key=f"edu_gpa_{i}")
+                
+                if degree and institution:
+                    education_entries.append({'degree': degree, 'institution': institution, 'year': year, 'gpa': gpa})
+                st.markdown("---")
+            
+            if st.form_submit_button("Save Education"):
+                st.session_state.resume_data['education'] = education_entries
+                st.success("✅ Education saved!")
     
     with st.expander("🏆 Certifications"):
         num_certs = st.number_input("Number of Certifications", min_value=0, max_value=10, value=1, key="num_certs")
-        cert_entries = []
-        
-        for i in range(num_certs):
-            st.markdown(f"**Certification #{i+1}**")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                cert_name = st.text_input(f"Certification Name", key=f"cert_name_{i}")
-            with col2:
-                cert_org = st.text_input(f"Issuing Organization", key=f"cert_org_{i}")
-            with col3:
-                cert_date = st.text_input(f"Date", key=f"cert_date_{i}")
+        with st.form("form_certifications"):
+            cert_entries = []
             
-            if cert_name and cert_org:
-                cert_entries.append({'name': cert_name, 'organization': cert_org, 'date': cert_date})
-            st.markdown("---")
-        
-        if st.button("Save Certifications", key="save_certs"):
-            st.session_state.resume_data['certifications'] = cert_entries
-            st.success("✅ Certifications saved!")
+            for i in range(num_certs):
+                st.markdown(f"**Certification #{i+1}**")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    cert_name = st.text_input(f"Certification Name", key=f"cert_name_{i}")
+                with col2:
+                    cert_org = st.text_input(f"Issuing Organization", key=f"cert_org_{i}")
+                with col3:
+                    cert_date = st.text_input(f"Date", key=f"cert_date_{i}")
+                
+                if cert_name and cert_org:
+                    cert_entries.append({'name': cert_name, 'organization': cert_org, 'date': cert_date})
+                st.markdown("---")
+            
+            if st.form_submit_button("Save Certifications"):
+                st.session_state.resume_data['certifications'] = cert_entries
+                st.success("✅ Certifications saved!")
     
     with st.expander("💼 Work Experience"):
         num_exp = st.number_input("Number of Work Experiences", min_value=0, max_value=10, value=1, key="num_exp")
-        exp_entries = []
-        
-        for i in range(num_exp):
-            st.markdown(f"**Experience #{i+1}**")
-            col1, col2 = st.columns(2)
-            with col1:
-                title = st.text_input(f"Job Title", key=f"exp_title_{i}")
-                company = st.text_input(f"Company", key=f"exp_company_{i}")
-            with col2:
-                duration = st.text_input(f"Duration", key=f"exp_duration_{i}")
+        with st.form("form_experience"):
+            exp_entries = []
             
-            description = st.text_area(f"Key Achievements", key=f"exp_desc_{i}", height=120)
+            for i in range(num_exp):
+                st.markdown(f"**Experience #{i+1}**")
+                col1, col2 = st.columns(2)
+                with col1:
+                    title = st.text_input(f"Job Title", key=f"exp_title_{i}")
+                    company = st.text_input(f"Company", key=f"exp_company_{i}")
+                with col2:
+                    duration = st.text_input(f"Duration", key=f"exp_duration_{i}")
+                
+                description = st.text_area(f"Key Achievements", key=f"exp_desc_{i}", height=120)
+                
+                if title and company:
+                    exp_entries.append({'title': title, 'company': company, 'duration': duration, 'description': description})
+                st.markdown("---")
             
-            if title and company:
-                exp_entries.append({'title': title, 'company': company, 'duration': duration, 'description': description})
-            st.markdown("---")
-        
-        if st.button("Save Work Experience", key="save_exp"):
-            st.session_state.resume_data['experience'] = exp_entries
-            st.success("✅ Work experience saved!")
+            if st.form_submit_button("Save Work Experience"):
+                st.session_state.resume_data['experience'] = exp_entries
+                st.success("✅ Work experience saved!")
     
     with st.expander("🚀 Projects"):
         num_projects = st.number_input("Number of Projects", min_value=0, max_value=10, value=1, key="num_projects")
-        project_entries = []
-        
-        for i in range(num_projects):
-            st.markdown(f"**Project #{i+1}**")
-            project_title = st.text_input(f"Project Title", key=f"proj_title_{i}")
-            project_link = st.text_input(f"Project Link (optional)", key=f"proj_link_{i}")
-            technologies = st.text_input(f"Technologies Used", key=f"proj_tech_{i}")
-            achievements = st.text_area(f"Key Achievements", key=f"proj_achievements_{i}", height=100)
+        with st.form("form_projects"):
+            project_entries = []
             
-            if project_title and technologies:
-                project_entries.append({
-                    'title': project_title,
-                    'link': project_link,
-                    'technologies': technologies,
-                    'achievements': achievements
-                })
-            st.markdown("---")
-        
-        if st.button("Save Projects", key="save_projects"):
-            st.session_state.resume_data['projects'] = project_entries
-            st.success("✅ Projects saved!")
+            for i in range(num_projects):
+                st.markdown(f"**Project #{i+1}**")
+                project_title = st.text_input(f"Project Title", key=f"proj_title_{i}")
+                project_link = st.text_input(f"Project Link (optional)", key=f"proj_link_{i}")
+                technologies = st.text_input(f"Technologies Used", key=f"proj_tech_{i}")
+                achievements = st.text_area(f"Key Achievements", key=f"proj_achievements_{i}", height=100)
+                
+                if project_title and technologies:
+                    project_entries.append({
+                        'title': project_title,
+                        'link': project_link,
+                        'technologies': technologies,
+                        'achievements': achievements
+                    })
+                st.markdown("---")
+            
+            if st.form_submit_button("Save Projects"):
+                st.session_state.resume_data['projects'] = project_entries
+                st.success("✅ Projects saved!")
     
     with st.expander("🛠️ Skills"):
         num_skills = st.number_input("Number of Skill Categories", min_value=0, max_value=10, value=1, key="num_skills")
-        skill_entries = []
-        
-        for i in range(num_skills):
-            st.markdown(f"**Skill Category #{i+1}**")
-            col1, col2 = st.columns(2)
-            with col1:
-                category = st.text_input(f"Category", key=f"skill_cat_{i}")
-            with col2:
-                items = st.text_input(f"Skills (comma separated)", key=f"skill_items_{i}")
+        with st.form("form_skills"):
+            skill_entries = []
             
-            if category and items:
-                skill_entries.append({'category': category, 'items': items})
-            st.markdown("---")
-        
-        if st.button("Save Skills", key="save_skills"):
-            st.session_state.resume_data['skills'] = skill_entries
-            st.success("✅ Skills saved!")
+            for i in range(num_skills):
+                st.markdown(f"**Skill Category #{i+1}**")
+                col1, col2 = st.columns(2)
+                with col1:
+                    category = st.text_input(f"Category", key=f"skill_cat_{i}")
+                with col2:
+                    items = st.text_input(f"Skills (comma separated)", key=f"skill_items_{i}")
+                
+                if category and items:
+                    skill_entries.append({'category': category, 'items': items})
+                st.markdown("---")
+            
+            if st.form_submit_button("Save Skills"):
+                st.session_state.resume_data['skills'] = skill_entries
+                st.success("✅ Skills saved!")
     
     st.markdown("---")
     
@@ -482,36 +970,13 @@ elif st.session_state.page == "Resume Builder":
                 st.error("Please fill in personal information!")
             else:
                 with st.spinner("Generating your resume..."):
-                    resume_prompt = ChatPromptTemplate.from_messages([
-                        ("system", f"""You are an expert resume writer. Create a {selected_template} style resume.
-                        
-Template guidelines: {RESUME_TEMPLATES[selected_template]}
-
-Format with clear sections, use strong action verbs, include metrics, and ensure ATS compatibility."""),
-                        ("human", """Create a professional resume with this information:
-
-Personal: {personal_info}
-Education: {education}
-Certifications: {certifications}
-Experience: {experience}
-Projects: {projects}
-Skills: {skills}
-Target Role: {target_role}""")
-                    ])
-                    
-                    resume_data = st.session_state.resume_data
-                    chain = resume_prompt | llm
-                    response = chain.invoke({
-                        "personal_info": json.dumps(resume_data['personal_info'], indent=2),
-                        "education": json.dumps(resume_data['education'], indent=2),
-                        "certifications": json.dumps(resume_data['certifications'], indent=2),
-                        "experience": json.dumps(resume_data['experience'], indent=2),
-                        "projects": json.dumps(resume_data['projects'], indent=2),
-                        "skills": json.dumps(resume_data['skills'], indent=2),
-                        "target_role": resume_data['personal_info'].get('target_role', 'Professional')
+                    resume_stream = chains['resume'].stream({
+                        **build_resume_payload(st.session_state.resume_data),
+                        "template_style": selected_template,
+                        "template_guidelines": RESUME_TEMPLATES[selected_template]
                     })
                     
-                    st.session_state.generated_resume = response.content
+                    st.session_state.generated_resume = st.empty().write_stream(resume_stream)
                     st.session_state.edit_mode = False
                     st.success("✅ Resume generated!")
                     st.rerun()
@@ -522,15 +987,7 @@ Target Role: {target_role}""")
                 st.error("Please generate a resume first!")
             else:
                 with st.spinner("Reviewing..."):
-                    review_prompt = ChatPromptTemplate.from_messages([
-                        ("system", "You are an expert resume reviewer. Provide brief, actionable feedback."),
-                        ("human", "Review this resume and suggest 3-5 key improvements:\n{resume}")
-                    ])
-                    
-                    chain = review_prompt | llm
-                    response = chain.invoke({"resume": st.session_state.generated_resume})
-                    
-                    st.info(response.content)
+                    st.write_stream(chains['review'].stream({"resume": st.session_state.generated_resume}))
     
     with col3:
         if st.button("💾 Save Version", use_container_width=True, key="save_version_btn"):
@@ -538,11 +995,13 @@ Target Role: {target_role}""")
                 st.error("Please generate a resume first!")
             else:
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-                version_name = f"Version_{len(st.session_state.resume_versions) + 1}_{timestamp}"
+                st.session_state.version_counter += 1
+                version_name = f"Version_{st.session_state.version_counter}_{timestamp}"
                 st.session_state.resume_versions[version_name] = st.session_state.generated_resume
                 st.success(f"✅ Saved as {version_name}")
     
     if st.session_state.generated_resume:
+        current_resume = st.session_state.generated_resume
         st.markdown("---")
         st.subheader("📄 Generated Resume")
         
@@ -553,33 +1012,30 @@ Target Role: {target_role}""")
                 st.rerun()
         
         if st.session_state.edit_mode:
-            edited_resume = st.text_area("Edit Your Resume", value=st.session_state.generated_resume, height=600, key="edit_resume")
+            edited_resume = st.text_area("Edit Your Resume", value=current_resume, height=600, key="edit_resume")
             if st.button("💾 Save Changes"):
                 st.session_state.generated_resume = edited_resume
                 st.session_state.edit_mode = False
                 st.success("✅ Changes saved!")
                 st.rerun()
         else:
-            st.text_area("Resume Preview", value=st.session_state.generated_resume, height=600, disabled=True, key="view_resume")
+            st.text_area("Resume Preview", value=current_resume, height=600, disabled=True, key="view_resume")
         
         st.markdown("### 📊 Resume Statistics")
         col1, col2, col3, col4 = st.columns(4)
         
+        word_count, line_count, action_verbs, metrics_count = resume_statistics(current_resume)
+        
         with col1:
-            word_count = len(st.session_state.generated_resume.split())
             st.metric("Word Count", word_count)
         
         with col2:
-            line_count = len(st.session_state.generated_resume.split('\n'))
             st.metric("Lines", line_count)
         
         with col3:
-            action_verbs = sum(1 for verb in ['led', 'managed', 'developed', 'implemented', 'created', 'improved'] 
-                              if verb in st.session_state.generated_resume.lower())
             st.metric("Action Verbs", action_verbs)
         
         with col4:
-            metrics_count = sum(1 for char in st.session_state.generated_resume if char.isdigit())
             st.metric("Metrics/Numbers", metrics_count)
         
         st.markdown("### 💾 Download Resume")
@@ -590,20 +1046,30 @@ Target Role: {target_role}""")
         with col1:
             st.download_button(
                 label="📥 Download as TXT",
-                data=st.session_state.generated_resume,
+                data=current_resume,
                 file_name=f"{file_name_base}_resume.txt",
                 mime="text/plain",
                 use_container_width=True,
                 key="download_txt"
             )
         
+        # Exports are only built on request; a prepared file is reused until the resume text changes
+        export_files = st.session_state.export_files
+        
         with col2:
             if PDF_EXPORT_SUPPORT:
-                pdf_data = export_to_pdf(st.session_state.generated_resume)
-                if pdf_data:
+                if export_files.get('pdf', (None, None))[0] != current_resume:
+                    if st.button("📄 Prepare PDF", use_container_width=True, key="prepare_pdf"):
+                        pdf_data, pdf_error = export_to_pdf(current_resume)
+                        if pdf_error:
+                            st.error(pdf_error)
+                        elif pdf_data:
+                            export_files['pdf'] = (current_resume, pdf_data)
+                            st.rerun()
+                else:
                     st.download_button(
                         label="📥 Download as PDF",
-                        data=pdf_data,
+                        data=export_files['pdf'][1],
                         file_name=f"{file_name_base}_resume.pdf",
                         mime="application/pdf",
                         use_container_width=True,
@@ -612,11 +1078,18 @@ Target Role: {target_role}""")
         
         with col3:
             if DOCX_SUPPORT:
-                docx_data = export_to_docx(st.session_state.generated_resume)
-                if docx_data:
+                if export_files.get('docx', (None, None))[0] != current_resume:
+                    if st.button("📄 Prepare DOCX", use_container_width=True, key="prepare_docx"):
+                        docx_data, docx_error = export_to_docx(current_resume)
+                        if docx_error:
+                            st.error(docx_error)
+                        elif docx_data:
+                            export_files['docx'] = (current_resume, docx_data)
+                            st.rerun()
+                else:
                     st.download_button(
                         label="📥 Download as DOCX",
-                        data=docx_data,
+                        data=export_files['docx'][1],
                         file_name=f"{file_name_base}_resume.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                         use_container_width=True,
@@ -652,14 +1125,7 @@ elif st.session_state.page == "ATS Scanner":
             uploaded_file = st.file_uploader("Upload resume", type=['txt', 'pdf', 'docx'])
             if uploaded_file:
                 try:
-                    if uploaded_file.type == "text/plain":
-                        resume_to_scan = uploaded_file.read().decode("utf-8")
-                    elif uploaded_file.type == "application/pdf" and PDF_SUPPORT:
-                        pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                        resume_to_scan = "\n".join([page.extract_text() for page in pdf_reader.pages])
-                    elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" and DOCX_SUPPORT:
-                        doc = DocxDocument(uploaded_file)
-                        resume_to_scan = "\n".join([para.text for para in doc.paragraphs])
+                    resume_to_scan = extract_resume_text(uploaded_file.getvalue(), uploaded_file.type)
                     st.success(f"✅ File uploaded: {uploaded_file.name}")
                 except Exception as e:
                     st.error(f"Error reading file: {str(e)}")
@@ -681,7 +1147,19 @@ elif st.session_state.page == "ATS Scanner":
             if job_desc:
                 job_descriptions.append(job_desc)
         
-        compare_mode = st.checkbox("Compare across all job descriptions", value=False)
+        single_request = st.checkbox("Analyze all job descriptions in one request", value=False, help="Sends the resume once for every job instead of once per job; each job still gets its own report")
+        
+        # Local keyword overlap needs no LLM call, so it is shown as soon as there is something to compare
+        if resume_to_scan and job_descriptions:
+            with st.expander("⚡ Instant Keyword Check", expanded=True):
+                for idx, job_desc in enumerate(job_descriptions):
+                    match_pct, missing = local_keyword_match(resume_to_scan, job_desc)
+                    col1, col2 = st.columns([1, 3])
+                    with col1:
+                        st.metric(f"Job #{idx+1} Keyword Match", f"{match_pct}%")
+                    with col2:
+                        st.caption("Missing: " + (", ".join(missing) if missing else "none"))
+                st.caption("Run the full scan below for AI scoring and suggestions.")
         
         if st.button("🔍 Scan Resume", type="primary", use_container_width=True):
             if not resume_to_scan:
@@ -689,113 +1167,63 @@ elif st.session_state.page == "ATS Scanner":
             elif not job_descriptions:
                 st.error("Please provide at least one job description!")
             else:
-                for idx, job_desc in enumerate(job_descriptions):
-                    st.markdown(f"### 📊 Analysis for Job #{idx+1}")
+                responses = None
+                try:
+                    with st.spinner(f"Analyzing {len(job_descriptions)} job description(s)..."):
+                        responses = run_ats_scan(resume_to_scan, job_descriptions, combined=single_request)
+                except ATSScanError as e:
+                    responses = e.replies
+                    st.warning("⚠️ Some analyses failed. Their results are not cached, so scanning again retries them.")
+                except Exception as e:
+                    st.error(f"ATS scan failed: {str(e)}")
+                if responses is not None:
+                    st.session_state.ats_results = {
+                        'inputs': (resume_to_scan, tuple(job_descriptions)),
+                        'reports': [
+                            {'raw': ATS_FAILED_REPLY.format(error=reply)} if isinstance(reply, Exception)
+                            else build_ats_report(reply)
+                            for reply in responses
+                        ]
+                    }
+        
+        # Reports are parsed once per scan and re-rendered from session state while the inputs are unchanged
+        ats_results = st.session_state.ats_results
+        if ats_results and ats_results['inputs'] == (resume_to_scan, tuple(job_descriptions)):
+            for idx, report in enumerate(ats_results['reports']):
+                st.markdown(f"### 📊 Analysis for Job #{idx+1}")
+                
+                if 'raw' in report:
+                    st.info(report['raw'])
+                else:
+                    st.markdown(SCORE_BAR_HTML.format_map(report), unsafe_allow_html=True)
                     
-                    with st.spinner(f"Analyzing job description {idx+1}..."):
-                        ats_prompt = ChatPromptTemplate.from_messages([
-                            ("system", """You are an ATS analyzer. Provide detailed analysis with:
-1. ATS Score (0-100)
-2. Keyword matching percentage
-3. Missing keywords
-4. Format issues
-5. Specific improvement suggestions
-
-Respond in JSON with 'score', 'keyword_match', 'missing_keywords', 'format_issues', and 'suggestions' fields."""),
-                            ("human", """Job Description:\n{job_description}\n\nResume:\n{resume}\n\nProvide comprehensive analysis.""")
-                        ])
-                        
-                        chain = ats_prompt | llm
-                        response = chain.invoke({"job_description": job_desc, "resume": resume_to_scan})
-                        
-                        try:
-                            response_text = response.content
-                            json_start = response_text.find('{')
-                            json_end = response_text.rfind('}') + 1
-                            result = json.loads(response_text[json_start:json_end])
-                            
-                            score = result.get('score', 75)
-                            keyword_match = result.get('keyword_match', '60%')
-                            missing_keywords = result.get('missing_keywords', [])
-                            suggestions = result.get('suggestions', response_text)
-                            
-                            color = "#00CC44" if score >= 80 else "#FFA500" if score >= 60 else "#FFD700" if score >= 40 else "#FF4444"
-                            status = ["Needs Improvement ❌", "Fair ⚠️", "Good 👍", "Excellent ✅"][min(3, score // 40)]
-                            
-                            progress_html = f"""
-                            <div style='position: relative; width: 100%; height: 50px; background-color: #f0f0f0; border-radius: 10px; overflow: hidden; margin: 20px 0;'>
-                                <div style='width: {score}%; height: 100%; background: linear-gradient(90deg, {color} 0%, {color} 100%);'></div>
-                                <div style='position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); font-weight: bold; font-size: 18px; color: #333;'>
-                                    Score: {score} — {status}
-                                </div>
-                            </div>
-                            """
-                            st.markdown(progress_html, unsafe_allow_html=True)
-                            
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("ATS Score", score)
-                            with col2:
-                                st.metric("Keyword Match", keyword_match)
-                            with col3:
-                                st.metric("Missing Keywords", len(missing_keywords) if isinstance(missing_keywords, list) else "N/A")
-                            
-                            st.markdown("---")
-                            
-                            suggestions_str = str(suggestions)
-                            
-                            st.markdown("### ✅ **Strengths**")
-                            if "strength" in suggestions_str.lower():
-                                strengths_section = [line.strip() for line in suggestions_str.split('\n') 
-                                                   if any(keyword in line.lower() for keyword in ['strength', 'strong', 'good', 'excellent', 'well'])]
-                                if strengths_section:
-                                    for item in strengths_section[:5]:
-                                        if item and len(item) > 5:
-                                            st.markdown(f"• {item.lstrip('•-*0123456789.) ')}")
-                                else:
-                                    st.markdown("• Resume aligns well with job requirements")
-                                    st.markdown("• Strong use of relevant keywords")
-                            else:
-                                st.markdown("• Resume aligns well with job requirements")
-                                st.markdown("• Good keyword coverage")
-                            
-                            st.markdown("### ⚠️ **Weaknesses**")
-                            if "weakness" in suggestions_str.lower() or "missing" in suggestions_str.lower():
-                                weaknesses_section = [line.strip() for line in suggestions_str.split('\n') 
-                                                    if any(keyword in line.lower() for keyword in ['weakness', 'weak', 'missing', 'lack', 'improve', 'add', 'consider'])]
-                                if weaknesses_section:
-                                    for item in weaknesses_section[:5]:
-                                        if item and len(item) > 5:
-                                            st.markdown(f"• {item.lstrip('•-*0123456789.) ')}")
-                                else:
-                                    st.markdown("• Consider adding more specific metrics")
-                                    st.markdown("• Include more industry-specific keywords")
-                            else:
-                                st.markdown("• Consider adding more metrics and numbers")
-                                st.markdown("• Include more technical keywords")
-                            
-                            st.markdown("### 🎯 **Missing Keywords**")
-                            if isinstance(missing_keywords, list) and missing_keywords:
-                                for keyword in missing_keywords[:10]:
-                                    st.markdown(f"• {keyword}")
-                            else:
-                                st.markdown("• No critical keywords missing")
-                            
-                            st.markdown("### 💡 ATS Optimization Tips")
-                            st.markdown("• Tailor the resume with keywords from the job description")
-                            st.markdown("• Quantify achievements with numbers and metrics")
-                            st.markdown("• Use strong action verbs to start bullet points")
-                            st.markdown("• Use standard section headings (Work Experience, Education, Skills)")
-                            st.markdown("• Avoid graphics, tables, and images")
-                            st.markdown("• Avoid using information in headers and footers")
-                            st.markdown("• Use standard fonts (Arial, Calibri, Times New Roman)")
-                            st.markdown("• Save as .docx or .pdf for best compatibility")
-                            st.markdown("• Proofread carefully to avoid errors")
-                        
-                        except:
-                            st.info(response.content)
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("ATS Score", report['score'])
+                    with col2:
+                        st.metric("Keyword Match", report['keyword_match'])
+                    with col3:
+                        st.metric("Missing Keywords", report['missing_count'])
                     
                     st.markdown("---")
+                    
+                    st.markdown("### ✅ **Strengths**")
+                    for item in report['strengths']:
+                        st.markdown(f"• {item}")
+                    
+                    st.markdown("### ⚠️ **Weaknesses**")
+                    for item in report['weaknesses']:
+                        st.markdown(f"• {item}")
+                    
+                    st.markdown("### 🎯 **Missing Keywords**")
+                    for keyword in report['missing_keywords']:
+                        st.markdown(f"• {keyword}")
+                    
+                    st.markdown("### 💡 ATS Optimization Tips")
+                    for tip in ATS_TIPS:
+                        st.markdown(f"• {tip}")
+                
+                st.markdown("---")
 
 elif st.session_state.page == "AI Assistant":
     st.title("💬 AI Assistant")
@@ -808,46 +1236,14 @@ elif st.session_state.page == "AI Assistant":
         if assist_mode == "General Chat":
             st.subheader("💬 Career Chat")
             
-            for message in st.session_state.chat_history_general:
-                if isinstance(message, dict) and "role" in message:
-                    if message["role"] == "user":
-                        st.markdown("""
-                        <div style='background-color: #020e73; padding: 15px; border-radius: 8px; margin: 10px 0; border-left: 4px solid #1f77b4;'>
-                            <h4><strong>👤 You:</strong></h4><br>
-                            """ + message['content'] + """
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.markdown("""
-                        <div style='background-color: #0f0f0f; padding: 15px; border-radius: 8px; margin: 10px 0; border-left: 4px solid #FFC107;'>
-                            <h3><strong>🤖 Assistant:</strong></h3><br>
-                            """ + message['content'] + """
-                        </div>
-                        """, unsafe_allow_html=True)
+            render_chat_history(st.session_state.chat_history_general)
             
-            col1, col2 = st.columns([0.85, 0.15])
-            
-            with col1:
-                user_input = st.text_input("Ask anything about careers, resumes, or job hunting", key="ai_input_general_input")
-            
-            with col2:
-                submit_button = st.button("Send", key="send_general")
-            
-            if submit_button and user_input:
-                with st.spinner("Thinking..."):
-                    st.session_state.chat_history_general.append({"role": "user", "content": user_input})
-                    
-                    chain = ChatPromptTemplate.from_messages([
-                        ("system", "You are a helpful career coach. Answer questions about resumes, job hunting, and interviews."),
-                        ("human", "{input}")
-                    ]) | llm
-                    
-                    response = chain.invoke({"input": user_input})
-                    st.session_state.chat_history_general.append({"role": "assistant", "content": response.content})
-                    st.rerun()
+            user_input = st.chat_input("Ask anything about careers, resumes, or job hunting", key="ai_input_general_input")
+            if user_input:
+                chat_turn(st.session_state.chat_history_general, user_input, stream_career_coach(user_input))
             
             if st.session_state.chat_history_general and st.button("🗑️ Clear History", key="clear_general"):
-                st.session_state.chat_history_general = []
+                st.session_state.chat_history_general.clear()
                 st.rerun()
         
         elif assist_mode == "Resume Guidance":
@@ -865,14 +1261,7 @@ elif st.session_state.page == "AI Assistant":
                 uploaded_file = st.file_uploader("Upload resume for guidance", type=['txt', 'pdf', 'docx'], key="guidance_uploader")
                 if uploaded_file:
                     try:
-                        if uploaded_file.type == "text/plain":
-                            selected_resume = uploaded_file.read().decode("utf-8")
-                        elif uploaded_file.type == "application/pdf" and PDF_SUPPORT:
-                            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                            selected_resume = "\n".join([page.extract_text() for page in pdf_reader.pages])
-                        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" and DOCX_SUPPORT:
-                            doc = DocxDocument(uploaded_file)
-                            selected_resume = "\n".join([para.text for para in doc.paragraphs])
+                        selected_resume = extract_resume_text(uploaded_file.getvalue(), uploaded_file.type)
                         
                         st.session_state.uploaded_resume = selected_resume
                         st.success(f"✅ File loaded: {uploaded_file.name}")
@@ -884,43 +1273,11 @@ elif st.session_state.page == "AI Assistant":
             else:
                 st.success("✅ Resume loaded for guidance")
                 
-                for message in st.session_state.chat_history_guidance:
-                    if isinstance(message, dict) and "role" in message:
-                        if message["role"] == "user":
-                            st.markdown("""
-                            <div style='background-color: #04027a; padding: 15px; border-radius: 8px; margin: 10px 0; border-left: 4px solid #1f77b4;'>
-                                <h4><strong>👤 You:</strong></h4><br>
-                                """ + message['content'] + """
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown("""
-                            <div style='background-color: #0a0a0a; padding: 15px; border-radius: 8px; margin: 10px 0; border-left: 4px solid #FFC107;'>
-                                <h4><strong>🤖 Assistant:</strong></h4><br>
-                                """ + message['content'] + """
-                            </div>
-                            """, unsafe_allow_html=True)
+                render_chat_history(st.session_state.chat_history_guidance)
                 
-                col1, col2 = st.columns([0.85, 0.15])
-                
-                with col1:
-                    user_input = st.text_input("Ask about your resume", key="ai_input_guidance_input")
-                
-                with col2:
-                    submit_button = st.button("Send", key="send_guidance")
-                
-                if submit_button and user_input:
-                    with st.spinner("Analyzing..."):
-                        st.session_state.chat_history_guidance.append({"role": "user", "content": user_input})
-                        
-                        chain = ChatPromptTemplate.from_messages([
-                            ("system", "You are a resume expert. Provide specific, actionable feedback on resumes."),
-                            ("human", "Resume:\n{resume}\n\nQuestion: {input}")
-                        ]) | llm
-                        
-                        response = chain.invoke({"resume": selected_resume, "input": user_input})
-                        st.session_state.chat_history_guidance.append({"role": "assistant", "content": response.content})
-                        st.rerun()
+                user_input = st.chat_input("Ask about your resume", key="ai_input_guidance_input")
+                if user_input:
+                    chat_turn(st.session_state.chat_history_guidance, user_input, stream_resume_expert(selected_resume, user_input))
                 
                 st.markdown("### 💡 Quick Actions")
                 
@@ -937,17 +1294,13 @@ elif st.session_state.page == "AI Assistant":
                     with cols[idx]:
                         if st.button(button_label, use_container_width=True, key=f"quick_btn_{idx}"):
                             with st.spinner("Getting response..."):
-                                st.session_state.chat_history_guidance.append({"role": "user", "content": question_text})
-                                
-                                chain = ChatPromptTemplate.from_messages([
-                                    ("system", "You are a resume expert. Provide specific, actionable feedback."),
-                                    ("human", "Resume:\n{resume}\n\nQuestion: {input}")
-                                ]) | llm
+                                st.session_state.chat_history_guidance.append(ChatMessage("user", question_text))
                                 
-                                response = chain.invoke({"resume": selected_resume, "input": question_text})
-                                st.session_state.chat_history_guidance.append({"role": "assistant", "content": response.content})
+                                # Collected rather than streamed: the button column is too narrow to show the reply
+                                response = "".join(stream_resume_expert(selected_resume, question_text))
+                                st.session_state.chat_history_guidance.append(ChatMessage("assistant", response))
                                 st.rerun()
                 
                 if st.session_state.chat_history_guidance and st.button("🗑️ Clear History", key="clear_guidance"):
-                    st.session_state.chat_history_guidance = []
+                    st.session_state.chat_history_guidance.clear()
                     st.rerun()